@@ -3,20 +3,27 @@
 
 """
 Weather Brief (10AM ET) — feed ALL items at once
-- Fetch ALL recent Weather US  RSS items within HOURS_BACK (no caps, no keyword filters)
-- Provide title + combined summary/description for EVERY item to ChatGPT in one prompt
+- Fetch ALL recent Weather US  RSS items within HOURS_BACK (no caps)
+- Cheap local keyword pre-filter for market/AI relevance (falls back to ALL items if fewer than MIN_RELEVANT match)
+- Provide title + combined (clipped) summary/description for every kept item to ChatGPT in one prompt
 - Model writes 2–5 numbered paragraphs (1), (2), …; each 2–3 sentences, no repetition across paragraphs
 - Inline citations must refer to the evidence list [1]..[N]; code normalizes, validates, and re-numbers cited items to clean 1..K
 - References mirror the final sequential numbering exactly (1..K), in order of first citation
 - Email marks "GPT summarize:" or fallback reason
 """
 
-import os, ssl, smtplib, feedparser, html, re, logging
+import os, ssl, smtplib, html, re, logging, json, atexit, functools, time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from io import BytesIO, StringIO
+import lxml.etree as ET
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from datetime import datetime, timedelta
-from dateutil import parser as dtparse
-import pytz
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
 # ---------------- Settings ----------------
 TIMEZONE = os.getenv("TIMEZONE", "America/New_York")
@@ -25,6 +32,11 @@ WEATHER_FEEDS = [
 ]
 HOURS_BACK = int(os.getenv("HOURS_BACK", "26"))
 INCLUDE_WEEKENDS = os.getenv("INCLUDE_WEEKENDS", "false").lower() == "true"
+MIN_RELEVANT = int(os.getenv("MIN_RELEVANT", "3"))  # keyword pre-filter needs at least this many hits
+ABSTRACT_MAX_CHARS = int(os.getenv("ABSTRACT_MAX_CHARS", "400"))  # clip abstracts before prompting (titles untouched)
+PROCESS_POOL_MIN_ENTRIES = int(os.getenv("PROCESS_POOL_MIN_ENTRIES", "200"))  # below this, clean entries in-process
+FEED_CACHE_PATH = os.getenv("FEED_CACHE_PATH", "/tmp/weather_feed_cache.json")
+FEED_TIMEOUT = int(os.getenv("FEED_TIMEOUT", "20"))
 
 # Delivery
 GMAIL_USER = os.getenv("GMAIL_USER")
@@ -37,6 +49,11 @@ USE_LLM = True
 OPENAI_MODEL = "gpt-4o-mini"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Batch API (prepare_brief.py / send_brief.py)
+BATCH_STATE_PATH = os.getenv("BATCH_STATE_PATH", "/tmp/weather_brief_batch.json")
+BATCH_WAIT_MINUTES = int(os.getenv("BATCH_WAIT_MINUTES", "5"))     # poll this long before going synchronous
+BATCH_POLL_SECONDS = int(os.getenv("BATCH_POLL_SECONDS", "30"))
+
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=LOG_LEVEL, format="%(levelname)s %(message)s")
@@ -45,105 +62,350 @@ USED_LLM = False
 FALLBACK_REASON = None
 
 # ---------------- Helpers ----------------
-tz = pytz.timezone(TIMEZONE)
+tz = ZoneInfo(TIMEZONE)
+
+# Precompiled patterns (used on every item / summary)
+_TAG_RE = re.compile(r"<[^>]+>")
+_CITE_RE = re.compile(r"\[(\d+)\]|\{(\d+)\}|\((\d+)\)")  # [n], {n} or (n)
+RELEVANCE_RE = re.compile(
+    r"\b(tesla|tsla|nvidia|nvda|openai|apple|aapl|microsoft|msft|alphabet|google|amazon|amzn|meta|"
+    r"ai|artificial intelligence|chips?|semiconductors?|fed|federal reserve|powell|cpi|inflation|"
+    r"jobs report|payrolls|gdp|recession|tariffs?|earnings|ipo|treasury|treasuries|yields?|bonds?|"
+    r"rates?|s&p|nasdaq|dow|stocks?|shares|wall street|markets?|oil|dollar|bitcoin|analysts?)\b",
+    re.I,
+)
+_BLANK_LINE = re.compile(r"\n\s*\n")
+_LEADING_NUM = re.compile(r"^(\d\))\s*")
+
+# One pooled keep-alive session for all feed requests (with retry on transient errors)
+SESSION = requests.Session()
+SESSION.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "Weather-today/1.0"})
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# Entry fields kept in the conditional-GET cache (enough to rebuild items on a 304)
+_CACHED_FIELDS = ("title", "link", "summary", "description", "published", "updated", "created")
+
+def load_feed_cache():
+    """{url: {"etag", "modified", "entries"}} persisted across runs; empty on any error."""
+    try:
+        with open(FEED_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_feed_cache(cache):
+    """Write only the configured feeds; tmp file + rename so a crashed run never leaves half a cache."""
+    cache = {url: cache[url] for url in WEATHER_FEEDS if url in cache}
+    tmp = FEED_CACHE_PATH + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, FEED_CACHE_PATH)
+    except Exception as e:
+        logging.warning(f"Could not write feed cache {FEED_CACHE_PATH}: {e}")
 
 def now_et():
     return datetime.now(tz)
 
-def within_window(dt):
-    cutoff = now_et() - timedelta(hours=HOURS_BACK)
-    return dt >= cutoff
-
+@functools.lru_cache(maxsize=2048)  # syndicated items repeat the same summary across feeds
 def clean_text(t: str) -> str:
     if not t:
         return ""
-    t = html.unescape(t)
-    t = re.sub(r"<[^>]+>", "", t)  # strip HTML tags if any
+    if "&" in t:
+        t = html.unescape(t)
+    if "<" not in t:
+        return t.strip()  # no tags to strip
+    t = _TAG_RE.sub("", t)  # strip HTML tags if any
     return t.strip()
 
-def parse_pubdate(entry):
-    for fld in ("published", "updated", "created"):
-        val = getattr(entry, fld, None)
-        if val:
+@functools.lru_cache(maxsize=1024)
+def _parse_date(val: str):
+    """RFC 822 (RSS pubDate) -> ISO 8601 (Atom) -> dateutil fallback; None if unparseable."""
+    try:
+        dt = parsedate_to_datetime(val)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(val.replace("Z", "+00:00"))
+        except ValueError:
             try:
+                from dateutil import parser as dtparse  # fuzzy last resort; imported only when needed
                 dt = dtparse.parse(val)
-                if not dt.tzinfo:
-                    dt = pytz.utc.localize(dt)
-                return dt.astimezone(tz)
             except Exception:
-                pass
+                return None
+    if not dt.tzinfo:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(tz)
+
+def parse_pubdate(entry):
+    for fld in ("published", "updated", "created"):
+        val = entry.get(fld)
+        if val:
+            dt = _parse_date(val)
+            if dt is not None:
+                return dt
     return now_et()
 
-def fetch_items():
-    """Fetch ALL recent items within HOURS_BACK; de-dup by link; newest first."""
-    items = []
-    for url in WEATHER_FEEDS:
-        logging.info(f"Fetching: {url}")
-        feed = feedparser.parse(url)
-        if getattr(feed, "bozo", 0):
-            logging.warning(f"Feed parse warning for {url}: {getattr(feed, 'bozo_exception', '')}")
-        for e in feed.entries:
-            title = clean_text(getattr(e, "title", "")) or ""
-            link  = getattr(e, "link", "") or ""
-            summary = clean_text(getattr(e, "summary", "")) or ""
-            description = clean_text(getattr(e, "description", "")) or ""
-            # Combine summary + description (avoid duplicate text)
-            combined = summary
-            if description and description not in summary:
-                combined = (summary + " " + description).strip() if summary else description
-            pub = parse_pubdate(e)
-            if not title or not link:
-                continue
-            if not INCLUDE_WEEKENDS and pub.weekday() >= 5:
+def _localname(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+# RSS/Atom child element -> entry key (feedparser-style names)
+_ENTRY_FIELDS = {
+    "title": "title",
+    "link": "link",
+    "description": "description",
+    "summary": "summary",
+    "pubDate": "published",
+    "published": "published",
+    "updated": "updated",
+    "date": "published",  # dc:date (RSS 1.0)
+}
+
+def parse_feed_bytes(data: bytes):
+    """
+    Stream-parse RSS 2.0 / RSS 1.0 / Atom bytes with lxml; return a list of entry dicts
+    (title, link, summary/description, published/updated). Parsed nodes are freed as we go.
+    """
+    entries, kind = [], None
+    for event, elem in ET.iterparse(BytesIO(data), events=("start", "end"), resolve_entities=False):
+        name = _localname(elem.tag)
+        if event == "start":
+            if kind is None:
+                kind = "entry" if name == "feed" else "item"  # Atom root is <feed>
+            continue
+        if name != kind:
+            continue
+        e = {}
+        for child in elem:
+            key = _ENTRY_FIELDS.get(_localname(child.tag))
+            if not key or e.get(key):
                 continue
-            if within_window(pub):
-                items.append({"title": title, "link": link, "abstract": combined, "pub": pub})
-    # de-dup by link; newest first
-    uniq = {it["link"]: it for it in items}
-    return sorted(uniq.values(), key=lambda x: x["pub"], reverse=True)
+            if key == "link" and not (child.text or "").strip():
+                if child.get("rel", "alternate") != "alternate":
+                    continue
+                e[key] = child.get("href", "")
+            else:
+                e[key] = "".join(child.itertext()).strip()
+        entries.append(e)
+        # keep memory flat: drop this node and already-processed siblings
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return entries
+
+def _fetch_one(url, cache):
+    """Download + parse one feed; runs on a worker thread (network-bound).
+    Sends If-None-Match/If-Modified-Since from `cache`; on 304 returns the cached entries."""
+    logging.info(f"Fetching: {url}")
+    cached = cache.get(url) or {}
+    headers = {}
+    # Only ask for a 304 when we can rebuild the feed from cached entries
+    if "entries" in cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+    try:
+        resp = SESSION.get(url, headers=headers, timeout=FEED_TIMEOUT)
+    except requests.RequestException as e:
+        logging.warning(f"Fetch failed for {url}: {e}")
+        return url, []
+    if resp.status_code == 304 and "entries" in cached:
+        logging.info(f"Not modified: {url}")
+        return url, cached["entries"]
+    if resp.status_code != 200:
+        logging.warning(f"Unexpected HTTP {resp.status_code} for {url}")
+        return url, []
+    try:
+        entries = parse_feed_bytes(resp.content)
+    except ET.XMLSyntaxError as e:
+        # Not well-formed XML: fall back to feedparser's tolerant parser
+        logging.warning(f"Feed parse warning for {url}: {e}")
+        import feedparser  # heavy; only needed for malformed feeds
+        entries = feedparser.parse(resp.content).entries
+    # Plain dicts from here on: no FeedParserDict __getattr__ bounce in the per-entry loop
+    entries = [{k: v for k in _CACHED_FIELDS if (v := e.get(k))} for e in entries]
+    cache[url] = {
+        "etag": resp.headers.get("ETag"),
+        "modified": resp.headers.get("Last-Modified"),
+        "entries": entries,
+    }
+    return url, entries
+
+def process_entry(e, cutoff):
+    """Clean one entry dict into an item; None if incomplete, weekend-excluded or older than `cutoff`.
+    Top-level and pure so it can run in a worker process."""
+    title = clean_text(e.get("title", "")) or ""
+    link  = e.get("link", "") or ""
+    if not title or not link:
+        return None
+    summary = clean_text(e.get("summary", "")) or ""
+    description = clean_text(e.get("description", "")) or ""
+    # Combine summary + description (avoid duplicate text)
+    combined = summary
+    if description and description not in summary:
+        combined = (summary + " " + description).strip() if summary else description
+    # Clip long abstracts at a word boundary to keep the prompt small
+    if len(combined) > ABSTRACT_MAX_CHARS:
+        combined = combined[:ABSTRACT_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+    pub = parse_pubdate(e)
+    if not INCLUDE_WEEKENDS and pub.weekday() >= 5:
+        return None
+    if pub < cutoff:
+        return None
+    return {"title": title, "link": link, "abstract": combined, "pub": pub}
+
+def fetch_items():
+    """Fetch ALL recent items within HOURS_BACK; de-dup by link (first seen wins); newest first."""
+    items, seen = [], set()
+    # One reference instant for the whole run
+    cutoff = now_et() - timedelta(hours=HOURS_BACK)
+    cache = load_feed_cache()
+    # Fetch all feeds concurrently (network-bound threads)
+    with ThreadPoolExecutor(max_workers=min(8, len(WEATHER_FEEDS)) or 1) as ex:
+        results = list(ex.map(lambda u: _fetch_one(u, cache), WEATHER_FEEDS))
+    save_feed_cache(cache)
+    entries = [e for _, feed_entries in results for e in feed_entries]
+    # Cleaning is CPU-bound; only worth a process pool for large runs
+    if len(entries) >= PROCESS_POOL_MIN_ENTRIES:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            processed = list(ex.map(functools.partial(process_entry, cutoff=cutoff), entries, chunksize=16))
+    else:
+        processed = [process_entry(e, cutoff) for e in entries]
+    for it in processed:
+        if it is None or it["link"] in seen:
+            continue
+        seen.add(it["link"])
+        items.append(it)
+    items.sort(key=lambda x: x["pub"], reverse=True)
+    return items
+
+def select_relevant(items):
+    """Keep items whose title/abstract hit RELEVANCE_RE; ALL items if fewer than MIN_RELEVANT match.
+    Idempotent, so the batch and synchronous paths number items identically."""
+    kept = [it for it in items if RELEVANCE_RE.search(it["title"]) or RELEVANCE_RE.search(it["abstract"])]
+    if len(kept) < MIN_RELEVANT:
+        return list(items)
+    return kept
 
 # --------- Citation & text utilities ----------
-def normalize_brackets(text: str) -> str:
-    """Convert {n} or (n) used as citations into [n]."""
-    text = re.sub(r"\{(\d+)\}", r"[\1]", text)
-    text = re.sub(r"\((\d+)\)", r"[\1]", text)
-    return text
-
-def strip_invalid_citations(text: str, max_n: int) -> str:
-    """Remove any [n] with n outside 1..max_n to avoid dangling refs."""
-    def repl(m):
-        n = int(m.group(1))
-        return m.group(0) if 1 <= n <= max_n else ""
-    return re.sub(r"\[(\d+)\]", repl, text)
-
-def extract_ref_order(summary_text: str, max_n: int):
-    """Unique [n]s in order of first appearance, constrained to 1..max_n."""
-    nums = []
-    for m in re.finditer(r"\[(\d+)\]", summary_text):
-        n = int(m.group(1))
-        if 1 <= n <= max_n and n not in nums:
-            nums.append(n)
-    return nums
-
-def renumber_citations(summary_text: str, cited_nums):
-    """Map old numbers (in first-appearance order) to new sequential 1..K; return (new_text, mapping old->new)."""
-    mapping = {old: i+1 for i, old in enumerate(cited_nums)}
-    def repl(m):
-        old = int(m.group(1))
-        return f"[{mapping[old]}]" if old in mapping else ""
-    new_text = re.sub(r"\[(\d+)\]", repl, summary_text)
-    return new_text, mapping
+def process_citations(text: str, max_n: int):
+    """
+    Single left-to-right pass over citations:
+    - {n} / (n) / [n] are all treated as [n]
+    - n outside 1..max_n is dropped (avoids dangling refs)
+    - remaining numbers are re-numbered 1..K in order of first appearance
+    Returns (new_text, mapping old->new).
+    """
+    mapping, out, pos = {}, [], 0
+    for m in _CITE_RE.finditer(text):
+        out.append(text[pos:m.start()])
+        pos = m.end()
+        n = int(m.group(1) or m.group(2) or m.group(3))
+        if 1 <= n <= max_n:
+            if n not in mapping:
+                mapping[n] = len(mapping) + 1
+            out.append(f"[{mapping[n]}]")
+    out.append(text[pos:])
+    return "".join(out), mapping
+
+def stylize(s: str) -> str:
+    """Escape one paragraph and bold its leading "1) ", "2) " for readability."""
+    return _LEADING_NUM.sub(r"<strong>\1</strong> ", html.escape(s))
 
 def html_paragraphs(text: str) -> str:
     """Turn blank-line-separated blocks into <p> tags."""
-    parts = [p.strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
-    return "".join(f"<p style='margin:8px 0; font-family:Arial,Helvetica,sans-serif; line-height:1.6;'>{html.escape(p)}</p>" for p in parts)
+    parts = [p.strip() for p in _BLANK_LINE.split(text.strip()) if p.strip()]
+    return "".join([f"<p style='margin:8px 0; font-family:Arial,Helvetica,sans-serif; line-height:1.6;'>{stylize(p)}</p>" for p in parts])
 
 # ---------------- LLM summarization ----------------
+# Structured output: all paragraphs come back in one JSON object (no "1)" label scraping)
+SUMMARY_SCHEMA = {
+    "name": "market_brief",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "paragraphs": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "theme": {"type": "string"},
+                        "text": {"type": "string"},
+                        "citations": {"type": "array", "items": {"type": "integer"}},
+                    },
+                    "required": ["theme", "text", "citations"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["paragraphs"],
+        "additionalProperties": False,
+    },
+}
+
+def summary_request(evidence: str, n: int) -> dict:
+    """Chat-completions request body (model, messages, response_format) for the brief."""
+    prompt = (
+        "Role: You are a professional U.S. financial-markets analyst.\n\n"
+        "Goal: From the article list below, include ONLY items that are materially relevant to "
+        "U.S. financial markets OR AI-related firms (like Tesla, Nvidia, OpenAI) OR corporate culture OR financial analysts"
+        "Ignore everything else.\n\n"
+        "Output rules:\n"
+        "1) Return 3–5 short paragraphs in the 'paragraphs' array, in reading order. "
+        "   Each paragraph must cover one DISTINCT firm or macro theme (its 'theme')—do not repeat a firm/theme across paragraphs.\n"
+        "2) Each 'text' should be 2–3 sentences; each paragraph has about 30 words; neutral tone; factual; no quotes/judgement/conclusion. "
+        "   Do not prefix it with a paragraph number.\n"
+        f"3) Use inline numeric citations [1]..[{n}] inside 'text' that refer ONLY to the evidence list below (do not invent numbers). "
+        "   Place each citation at the end of the clause it supports. If multiple articles support a point, "
+        "   chain ALL relevant citations like [3][7][12]. There is NO upper limit on citations per paragraph, but make sure no repeatitive citations. "
+        "   List the same numbers in 'citations'.\n"
+        "4) Do NOT re-number sources; keep the evidence numbers exactly as provided. "
+        "   (The system will remap cited sources to 1..K later.)\n\n"
+        f"{evidence}"
+    )
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": "Be concise, objective, and market-focused."},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.2,
+        "response_format": {"type": "json_schema", "json_schema": SUMMARY_SCHEMA},
+    }
+
+def paragraphs_to_text(content: str) -> str:
+    """Flatten the JSON paragraphs into '1) …' blocks; plain text is passed through.
+    Raises ValueError on a missing (refused) or empty response so callers fall back."""
+    if not content or not content.strip():
+        raise ValueError("empty/refused structured response")
+    try:
+        paras = json.loads(content)["paragraphs"]
+    except (TypeError, ValueError, KeyError):
+        return content.strip()
+    blocks = []
+    for p in paras:
+        text = (p.get("text") or "").strip()
+        if not text:
+            continue
+        # citations only in the array -> append them so the reference pipeline sees them
+        if not _CITE_RE.search(text) and p.get("citations"):
+            text += " " + "".join(f"[{c}]" for c in p["citations"])
+        blocks.append(f"{len(blocks) + 1}) {text}")
+    if not blocks:
+        raise ValueError("empty/refused structured response")
+    return "\n\n".join(blocks)
+
 def summarize_overall(numbered_items):
     """
     Feed ALL items at once.
-    Require 2–5 numbered paragraphs ('1)', '2)', …), each a distinct firm/theme (no repetition).
+    Require 2–5 paragraphs (JSON, flattened locally to '1)', '2)', …), each a distinct firm/theme (no repetition).
     Allow unlimited chained citations referring ONLY to evidence [1]..[N].
     """
     global USED_LLM, FALLBACK_REASON
@@ -154,112 +416,161 @@ def summarize_overall(numbered_items):
         FALLBACK_REASON = "NO_ITEMS"
         return "No fresh market-moving headlines in the last 24 hours."
 
-    # Build evidence list from ALL items
-    evidence = "\n".join(
-        f"[{i+1}] {it['title']} ({it['link']}): {it['abstract']}"
-        for i, it in enumerate(numbered_items)
-    )
+    evidence = build_evidence(numbered_items)
 
     if not USE_LLM or not OPENAI_API_KEY:
         USED_LLM = False
         FALLBACK_REASON = "NO_API_KEY" if not OPENAI_API_KEY else "USE_LLM_FALSE"
-        # simple fallback: first two titles
-        return (
-            "1) " + (numbered_items[0]['title'] if n >= 1 else "No item") + "\n\n"
-            "2) " + (numbered_items[1]['title'] if n >= 2 else "")
-        ).strip()
+        return fallback_summary(numbered_items)
 
     try:
         from openai import OpenAI
         client = OpenAI(api_key=OPENAI_API_KEY)
-        prompt = (
-            "Role: You are a professional U.S. financial-markets analyst.\n\n"
-            "Goal: From the article list below, include ONLY items that are materially relevant to "
-            "U.S. financial markets OR AI-related firms (like Tesla, Nvidia, OpenAI) OR corporate culture OR financial analysts"
-            "Ignore everything else.\n\n"
-            "Output rules:\n"
-            "1) Write 3–5 short, numbered paragraphs as '1)', '2)', '3)'. "
-            "   Each paragraph must cover one DISTINCT firm or macro theme—do not repeat a firm/theme across paragraphs.\n"
-            "2) Each paragraph should be 2–3 sentences; each paragraph has about 30 words; neutral tone; factual; no quotes/judgement/conclusion.\n"
-            f"3) Use inline numeric citations [1]..[{n}] that refer ONLY to the evidence list below (do not invent numbers). "
-            "   Place each citation at the end of the clause it supports. If multiple articles support a point, "
-            "   chain ALL relevant citations like [3][7][12]. There is NO upper limit on citations per paragraph, but make sure no repeatitive citations.\n"
-            "4) Do NOT re-number sources; keep the evidence numbers exactly as provided. "
-            "   (The system will remap cited sources to 1..K later.)\n\n"
-            f"{evidence}"
-        )
-        resp = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "Be concise, objective, and market-focused."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-        )
+        resp = client.chat.completions.create(**summary_request(evidence, n))
+        summary = paragraphs_to_text(resp.choices[0].message.content)
         USED_LLM = True
         FALLBACK_REASON = None
-        return resp.choices[0].message.content.strip()
+        return summary
     except Exception as e:
         USED_LLM = False
         FALLBACK_REASON = f"OPENAI_ERROR: {e}"
         logging.warning(f"LLM failed; fallback. Reason: {FALLBACK_REASON}")
-        return (
-            "1) " + (numbered_items[0]['title'] if n >= 1 else "No item") + "\n\n"
-            "2) " + (numbered_items[1]['title'] if n >= 2 else "")
-        ).strip()
-
-# ---------------- Email build/send ----------------
-def build_email(items):
-    date_str = now_et().strftime("%A, %b %d, %Y")
-
-    # Use ALL fetched items; number once (1..N) in newest-first order
-    numbered = list(items)
-
-    # Summarize and clean citations
-    overall_raw = summarize_overall(numbered)
-    overall = normalize_brackets(overall_raw)
-    overall = strip_invalid_citations(overall, len(numbered))
-
-    # Extract cited evidence numbers (old) in first-appearance order
-    old_order = extract_ref_order(overall, len(numbered))
-
-    # Re-number to clean 1..K and build references accordingly
-    if old_order:
-        overall, mapping = renumber_citations(overall, old_order)
-        refs_html_parts, refs_text_parts = [], []
-        for old, new in sorted(mapping.items(), key=lambda kv: kv[1]):
-            it = numbered[old - 1]
-            refs_html_parts.append(f"[{new}] <a href='{it['link']}'>{html.escape(it['title'])}</a>")
-            refs_text_parts.append(f"[{new}] {it['title']} {it['link']}")
-    else:
-        mapping = {}
-        refs_html_parts = ["No references available."]
-        refs_text_parts = ["No references available."]
-
-    refs_html = "<br>".join(refs_html_parts)
-    refs_text = "\n".join(refs_text_parts)
-
-    origin_label = "GPT summarize:" if USED_LLM else f"Fallback summary (reason: {FALLBACK_REASON}):"
-
-    # Render numbered paragraphs nicely
-    def html_paragraphs(text: str) -> str:
-        parts = [p.strip() for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
-        # Bold the leading "1) ", "2) " for readability
-        def stylize(s: str) -> str:
-            return re.sub(r"^(\d\))\s*", r"<strong>\1</strong> ", html.escape(s))
-        return "".join(f"<p style='margin:8px 0; font-family:Arial,Helvetica,sans-serif; line-height:1.6;'>{stylize(p)}</p>" for p in parts)
+        return fallback_summary(numbered_items)
+
+def build_evidence(numbered_items) -> str:
+    """Evidence list [1]..[N] fed to the model, one line per item (written straight into one buffer)."""
+    buf = StringIO()
+    write = buf.write
+    for i, it in enumerate(numbered_items):
+        if i:
+            write("\n")
+        write(f"[{i+1}] ")
+        write(it['title'])
+        write(" (")
+        write(it['link'])
+        write("): ")
+        write(it['abstract'])
+    return buf.getvalue()
+
+def fallback_summary(numbered_items) -> str:
+    """Simple fallback: first two titles."""
+    n = len(numbered_items)
+    return (
+        "1) " + (numbered_items[0]['title'] if n >= 1 else "No item") + "\n\n"
+        "2) " + (numbered_items[1]['title'] if n >= 2 else "")
+    ).strip()
+
+# ---------------- Batch API (non-urgent brief) ----------------
+def submit_batch(numbered_items) -> str:
+    """Upload a one-line JSONL batch for the brief; return the batch id."""
+    from openai import OpenAI
+    client = OpenAI(api_key=OPENAI_API_KEY)
+    line = {
+        "custom_id": "brief",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": summary_request(build_evidence(numbered_items), len(numbered_items)),
+    }
+    upload = client.files.create(
+        file=("brief.jsonl", (json.dumps(line) + "\n").encode("utf-8")),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=upload.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
 
-    html_summary = html_paragraphs(overall)
+def poll_batch_summary(batch_id: str, wait_minutes: int = BATCH_WAIT_MINUTES):
+    """
+    Poll the batch until completed or `wait_minutes` elapse.
+    Returns the flattened summary text, or None if not ready/failed (caller goes synchronous).
+    """
+    global USED_LLM, FALLBACK_REASON
+    try:
+        from openai import OpenAI
+        client = OpenAI(api_key=OPENAI_API_KEY)
+        deadline = time.monotonic() + wait_minutes * 60
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status == "completed":
+                break
+            if batch.status in ("failed", "expired", "cancelled", "cancelling"):
+                logging.warning(f"Batch {batch_id} ended with status {batch.status}")
+                return None
+            if time.monotonic() >= deadline:
+                logging.warning(f"Batch {batch_id} not ready (status {batch.status}); cancelling")
+                # we are going synchronous, so don't let the batch finish and bill as well
+                try:
+                    client.batches.cancel(batch_id)
+                except Exception as e:
+                    logging.warning(f"Could not cancel batch {batch_id}: {e}")
+                return None
+            time.sleep(BATCH_POLL_SECONDS)
+        if not batch.output_file_id:
+            logging.warning(f"Batch {batch_id} completed without output")
+            return None
+        for raw in client.files.content(batch.output_file_id).text.splitlines():
+            out = json.loads(raw) if raw.strip() else {}
+            resp = out.get("response") or {}
+            if out.get("custom_id") == "brief" and resp.get("status_code") == 200:
+                summary = paragraphs_to_text(resp["body"]["choices"][0]["message"]["content"])
+                USED_LLM = True
+                FALLBACK_REASON = None
+                return summary
+        logging.warning(f"Batch {batch_id} returned no usable response")
+    except Exception as e:
+        logging.warning(f"Batch retrieval failed for {batch_id}: {e}")
+    return None
+
+def save_batch_state(batch_id: str, items):
+    """Persist batch id + the numbered items (their order defines [1]..[N])."""
+    state = {
+        "batch_id": batch_id,
+        "created": now_et().isoformat(),
+        "items": [dict(it, pub=it["pub"].isoformat()) for it in items],
+    }
+    with open(BATCH_STATE_PATH, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+def mark_batch_sent():
+    """Flag the saved state as used so a re-run/manual run does not resend the same brief."""
+    try:
+        with open(BATCH_STATE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        state["sent"] = now_et().isoformat()
+        with open(BATCH_STATE_PATH, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    except Exception as e:
+        logging.warning(f"Could not mark batch state {BATCH_STATE_PATH} as sent: {e}")
 
-    # Plain text
-    text_body = (
-        f"WSJ Markets Brief — {date_str}\n\n"
-        f"{origin_label}\n{overall}\n\n"
-        f"References:\n{refs_text}"
-    )
+def load_batch_state():
+    """(batch_id, items) from save_batch_state, or (None, None) if absent/unreadable/already sent/older than 24h."""
+    try:
+        with open(BATCH_STATE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("sent"):
+            logging.info(f"Batch state already sent at {state['sent']}")
+            return None, None
+        if now_et() - datetime.fromisoformat(state["created"]) > timedelta(hours=24):
+            logging.info(f"Ignoring stale batch state from {state['created']}")
+            return None, None
+        items = [dict(it, pub=datetime.fromisoformat(it["pub"])) for it in state["items"]]
+        return state["batch_id"], items
+    except Exception:
+        return None, None
 
-    # HTML
-    html_body = f"""
+# ---------------- Email build/send ----------------
+# Plain text
+_TEXT_TMPL = (
+    "WSJ Markets Brief — {date_str}\n\n"
+    "{origin_label}\n{overall}\n\n"
+    "References:\n{refs_text}"
+)
+
+# HTML
+_HTML_TMPL = """
     <html><body>
       <h2 style="margin:0 0 10px;">WSJ Markets Brief — {date_str}</h2>
       <div style="font-family:Arial,Helvetica,sans-serif;font-size:14px;line-height:1.6;">
@@ -276,13 +587,89 @@ def build_email(items):
       </div>
     </body></html>
     """
+
+def build_email(items, overall_raw=None):
+    """Render (text, html) bodies; `overall_raw` is a precomputed summary (e.g. from the Batch API)."""
+    date_str = now_et().strftime("%A, %b %d, %Y")
+
+    # Keep relevant items; number once (1..N) in newest-first order
+    numbered = select_relevant(items)
+
+    # Summarize and clean citations
+    if overall_raw is None:
+        overall_raw = summarize_overall(numbered)
+    overall, mapping = process_citations(overall_raw, len(numbered))
+
+    # References follow the clean 1..K numbering (order of first citation)
+    # (mapping is built in first-citation order, so it already iterates as 1..K)
+    if mapping:
+        html_buf, text_buf = StringIO(), StringIO()
+        for old, new in mapping.items():
+            it = numbered[old - 1]
+            if new > 1:
+                html_buf.write("<br>")
+                text_buf.write("\n")
+            html_buf.write(f"[{new}] <a href='{it['link']}'>{html.escape(it['title'])}</a>")
+            text_buf.write(f"[{new}] {it['title']} {it['link']}")
+        refs_html = html_buf.getvalue()
+        refs_text = text_buf.getvalue()
+    else:
+        refs_html = refs_text = "No references available."
+
+    origin_label = "GPT summarize:" if USED_LLM else f"Fallback summary (reason: {FALLBACK_REASON}):"
+
+    # Render numbered paragraphs nicely
+    html_summary = html_paragraphs(overall)
+
+    fields = {
+        "date_str": date_str,
+        "origin_label": origin_label,
+        "overall": overall,
+        "html_summary": html_summary,
+        "refs_text": refs_text,
+        "refs_html": refs_html,
+    }
+    text_body = _TEXT_TMPL.format_map(fields)
+    html_body = _HTML_TMPL.format_map(fields)
     return text_body, html_body
 
-def send_email(text_body, html_body):
+_SMTP = None
+
+def _close_smtp():
+    global _SMTP
+    if _SMTP is not None:
+        try:
+            _SMTP.quit()
+        except Exception:
+            pass
+        _SMTP = None
+
+atexit.register(_close_smtp)
+
+def get_smtp():
+    """Lazily open one authenticated Gmail SMTP session and reuse it for the rest of the job."""
+    global _SMTP
+    if _SMTP is not None:
+        try:
+            if _SMTP.noop()[0] == 250:
+                return _SMTP
+        except smtplib.SMTPException:
+            pass
+        _SMTP = None
     if not GMAIL_USER or not GMAIL_PASS:
         raise RuntimeError("GMAIL_USER and GMAIL_APP_PASSWORD must be set.")
     pw = GMAIL_PASS.replace(" ", "").replace("\u00a0", "").strip()
 
+    ctx = ssl.create_default_context()
+    server = smtplib.SMTP("smtp.gmail.com", 587)
+    server.ehlo()
+    server.starttls(context=ctx)
+    server.ehlo()  # refresh server extensions over TLS
+    server.login(GMAIL_USER, pw)
+    _SMTP = server
+    return server
+
+def send_email(text_body, html_body, server=None):
     msg = MIMEMultipart("alternative")
     msg["Subject"] = f"WSJ Markets Brief — {now_et().strftime('%b %d')}"
     msg["From"] = f"{FROM_NAME} <{GMAIL_USER}>"
@@ -291,11 +678,8 @@ def send_email(text_body, html_body):
     msg.attach(MIMEText(text_body, "plain"))
     msg.attach(MIMEText(html_body, "html"))
 
-    ctx = ssl.create_default_context()
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls(context=ctx)
-        server.login(GMAIL_USER, pw)
-        server.sendmail(GMAIL_USER, [TO_EMAIL], msg.as_string())
+    server = server or get_smtp()
+    server.sendmail(GMAIL_USER, [TO_EMAIL], msg.as_string())
 
 # ---------------- Main ----------------
 if __name__ == "__main__":
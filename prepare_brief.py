@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Evening half of the Batch API brief (runs ~9PM ET)
+- Fetch feeds exactly like Weather_today.py
+- Submit the summary prompt to the OpenAI Batch API (50% cheaper, separate rate limits)
+- Persist batch id + numbered items to BATCH_STATE_PATH for send_brief.py
+"""
+
+import logging
+import Weather_today as wt
+
+if __name__ == "__main__":
+    logging.info("Preparing batch brief…")
+    items = wt.fetch_items()
+    logging.info(f"Fetched {len(items)} items (pre-filter).")
+    items = wt.select_relevant(items)  # same numbering build_email will use
+    if not items or not wt.USE_LLM or not wt.OPENAI_API_KEY:
+        logging.info("Nothing to submit (no items or LLM disabled); send_brief.py will run synchronously.")
+    else:
+        batch_id = wt.submit_batch(items)
+        wt.save_batch_state(batch_id, items)
+        logging.info(f"Submitted batch {batch_id}; state saved to {wt.BATCH_STATE_PATH}")
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Morning half of the Batch API brief (runs 10AM ET)
+- Load batch id + items saved by prepare_brief.py
+- Poll the batch for up to BATCH_WAIT_MINUTES; use its summary if completed
+- Otherwise fall back to the synchronous path (fresh fetch + summarize_overall)
+- Build and send the email as Weather_today.py does, then mark the batch state as sent
+"""
+
+import logging
+import Weather_today as wt
+
+if __name__ == "__main__":
+    logging.info("Starting batch brief send…")
+    batch_id, items = wt.load_batch_state()
+    summary = wt.poll_batch_summary(batch_id) if batch_id else None
+    if summary is None:
+        logging.info("No batch result; summarizing synchronously.")
+        items = wt.fetch_items()
+    text_body, html_body = wt.build_email(items, summary)
+    wt.send_email(text_body, html_body)
+    if batch_id:
+        wt.mark_batch_sent()  # a later manual run/re-run must not resend this batch
+    logging.info(f"Sent brief to {wt.TO_EMAIL}. USED_LLM={wt.USED_LLM} FALLBACK_REASON={wt.FALLBACK_REASON}")